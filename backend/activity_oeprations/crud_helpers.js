@@ -43,15 +43,17 @@ export async function updateActivityScore(
   productivity_score,
   user_provided
 ) {
-  const { data, error } = await supabase
+  // no .select(): the row is never read back, so only the matched count is returned
+  const { error, count } = await supabase
     .from("activity_logs")
-    .update({
-      productivity_score: productivity_score,
-      user_provided: user_provided,
-    }) // if user_provided then so, else false
-    .eq("id", id)
-    .select()
-    .single();
+    .update(
+      {
+        productivity_score: productivity_score,
+        user_provided: user_provided,
+      }, // if user_provided then so, else false
+      { count: "exact" }
+    )
+    .eq("id", id);
 
   if (error) {
     console.error(
@@ -60,4 +62,11 @@ export async function updateActivityScore(
     );
     throw error;
   }
+
+  // .single() used to reject a missing or deleted id; keep that
+  if (count === 0) {
+    const notFound = new Error(`No activity log with id ${id}`);
+    console.error("[operations.crud_helpers.uAS] Error updating activity scores:", notFound);
+    throw notFound;
+  }
 }
@@ -1,5 +1,7 @@
+import supabase from "../../supabase-client.js";
+
 // activity_rows -> session prod_score
-export function calculateSessionScoreAndTime(activty_rows) {
+export function calculateSessionScoreAndTime(activity_rows) {
   let totalWeightedScore = 0;
   let totalDuration = 0;
   for (const a of activity_rows) {
@@ -10,6 +12,8 @@ export function calculateSessionScoreAndTime(activty_rows) {
     console.log(
       "[operations/helpers] a session with duration was created. check session creation logic"
     );
+    // 0/0 would store NaN as the session score
+    return [0, 0];
   }
   return [Math.round(totalWeightedScore / totalDuration), totalDuration];
 }
@@ -28,7 +32,8 @@ export async function fetchActivityLogsByIdRange(startId, endId) {
 
   const { data, error } = await supabase
     .from("activity_logs")
-    .select()
+    // only what session scoring and naming read
+    .select("id, timestamp_start, details, duration_sec, productivity_score")
     .gte("id", startId)
     .lte("id", endId)
     .order("id", { ascending: true });
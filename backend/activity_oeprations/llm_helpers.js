@@ -1,29 +1,71 @@
+import { createHash } from "node:crypto";
+import supabase from "../../supabase-client.js";
 import { chat } from "../llm/chat.js";
 
-// NOTE: The following two functions were not updated as they were not part of the request.
-// They might need adjustments to work correctly with the new logging and chat function.
-export async function generateSessionName(dominantType = "general") {
+// Fixed prompt text is built once at load; only the per-call parts are interpolated.
+const SESSION_NAME_SYSTEM_PROMPT =
+  "You are an expert at summarizing a series of user activities into a concise session title. Each activity has a timestamp, duration, and details. Return only a short (<5 words) session name that captures the main theme.";
+
+const ACTIVITY_SCORE_PREAMBLE = `
+    You are an intelligent assistant that helps quantify user productivity.
+    Your task is to provide a personalized productivity score by following two steps:
+    1. First, use your general knowledge to determine a baseline productivity score for an activity.
+    2. Second, adjust that baseline score based on the user's personal preferences, which are revealed in their past corrections below.
+
+    The final score must be a single integer between -10 (highly unproductive) and +10 (highly productive).
+
+    Here are examples of the user's past corrections. Analyze them to understand how their definition of productivity might differ from the norm:
+    ---
+    `;
+
+const ACTIVITY_SCORE_RESPONSE_FORMAT = `
+
+    You MUST respond with ONLY a valid JSON object with two keys: "score" (the final integer score) and "reasoning" (a brief, one-sentence explanation for your final score).
+  `;
+
+// LLM result caches: Maps keep insertion order, so the first key is the oldest
+function rememberBounded(cache, max, key, value) {
+  if (cache.size >= max) {
+    cache.delete(cache.keys().next().value);
+  }
+  cache.set(key, value);
+}
+
+// sha256 of the rendered session prompt -> name; re-persisting the same window
+// (retries, reprocessing) reuses the name instead of another LLM call. The digest
+// keeps keys small: a prompt carries every activity in the window
+const SESSION_NAME_CACHE_MAX = 500;
+const sessionNameCache = new Map();
+
+export async function generateSessionName(activities, dominantType = "general") {
   if (!activities.length) return "Empty Session";
   const payload = activities.map((a) => ({
     timestamp: a.timestamp_start,
     duration_sec: a.duration_sec,
     details: a.details,
   }));
-  const systemPrompt =
-    "You are an expert at summarizing a series of user activities into a concise session title. Each activity has a timestamp, duration, and details. Return only a short (<5 words) session name that captures the main theme.";
   const userPrompt = `Activities (JSON):\n${JSON.stringify(
     payload,
     null,
     2
   )}\n\nDominant type: ${dominantType}\n\nGive me a one-line session name.`;
+
+  const cacheKey = createHash("sha256").update(userPrompt).digest("hex");
+  const cached = sessionNameCache.get(cacheKey);
+  if (cached) return cached;
+
   const resp = await chat(
     [
-      { role: "system", content: systemPrompt },
+      { role: "system", content: SESSION_NAME_SYSTEM_PROMPT },
       { role: "user", content: userPrompt },
     ],
     { temperature: 0.0 }
   );
-  return resp.choices?.[0]?.message?.content?.trim() || "Unnamed Session";
+  const name = resp.choices?.[0]?.message?.content?.trim();
+  if (!name) return "Unnamed Session";
+
+  rememberBounded(sessionNameCache, SESSION_NAME_CACHE_MAX, cacheKey, name);
+  return name;
 }
 
 export async function addCommentaryToSession(
@@ -41,6 +83,11 @@ export async function addCommentaryToSession(
   }
 }
 
+// details + correction history -> parsed LLM score; window titles repeat all day,
+// so most activities are scored from here
+const SCORE_CACHE_MAX = 5000;
+const scoreCache = new Map();
+
 /**
  * Generates a personalized productivity score for a new activity.
  * The LLM first determines a general baseline score and then adjusts it based on the user's past corrections.
@@ -54,10 +101,6 @@ export async function generateActivityScore(
   activityDetails,
   userCorrectedData
 ) {
-  console.log(
-    '(1/4) [llm_helpers.js] Starting generateActivityScore for:", activityDetails'
-  );
-
   const examples = userCorrectedData
     .map(
       (item) =>
@@ -65,45 +108,27 @@ export async function generateActivityScore(
     )
     .join("\n---\n");
 
-  const prompt = `
-    You are an intelligent assistant that helps quantify user productivity.
-    Your task is to provide a personalized productivity score by following two steps:
-    1. First, use your general knowledge to determine a baseline productivity score for an activity.
-    2. Second, adjust that baseline score based on the user's personal preferences, which are revealed in their past corrections below.
+  const cacheKey = `${activityDetails}\u0000${examples}`;
+  const cached = scoreCache.get(cacheKey);
+  if (cached) return cached;
 
-    The final score must be a single integer between -10 (highly unproductive) and +10 (highly productive).
-
-    Here are examples of the user's past corrections. Analyze them to understand how their definition of productivity might differ from the norm:
-    ---
-    ${examples}
+  const prompt = `${ACTIVITY_SCORE_PREAMBLE}${examples}
     ---
 
     Now, for the new activity below, first consider a general score, then adjust it based on the user's feedback history to produce a final, personalized score.
 
-    New Activity: "${activityDetails}"
-
-    You MUST respond with ONLY a valid JSON object with two keys: "score" (the final integer score) and "reasoning" (a brief, one-sentence explanation for your final score).
-  `;
-
-  console.log(
-    "(2/4) [llm_helpers.js] Prompt constructed. Calling chat function."
-  );
+    New Activity: "${activityDetails}"${ACTIVITY_SCORE_RESPONSE_FORMAT}`;
 
   try {
     const messages = [{ role: "user", content: prompt }];
     const response = await chat(messages, { fmt: "json" });
-    console.log("(3/4) [llm_helpers.js] Received response from chat function.");
-
     const content = response.choices[0].message.content;
     const result = JSON.parse(content);
 
-    console.log(
-      "(4/4) [llm_helpers.js] Successfully parsed LLM response:",
-      result
-    );
+    rememberBounded(scoreCache, SCORE_CACHE_MAX, cacheKey, result);
     return result;
   } catch (error) {
-    console.error("(5!/4) [llm_helpers.js] An error occurred:", error);
+    console.error("[llm_helpers.js] Error generating activity score:", error);
     return { score: 0, reasoning: "Failed to generate score due to an error." };
   }
 }
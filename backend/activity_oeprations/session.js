@@ -1,16 +1,13 @@
-import supabase from "../supabase-client.js";
-import { chat } from "../helpers/operations_helpers.js";
+import supabase from "../../supabase-client.js";
 import {
   calculateSessionScoreAndTime,
   fetchActivityLogsByIdRange,
 } from "./helpers.js";
 import { addCommentaryToSession, generateSessionName } from "./llm_helpers.js";
 
-// to be called once we decide the window for sessions, the window must be sessions (BACK)
-export async function colourAndPersistSession(
-  activity_id_start,
-  activity_id_end
-) {
+// activity id window -> activity_sessions row; attribute failures are logged and the
+// row is still built, so a session is saved even without a score or name
+async function buildSessionRow(activity_id_start, activity_id_end, commentary = null) {
   let activity_rows;
 
   try {
@@ -26,9 +23,6 @@ export async function colourAndPersistSession(
 
   try {
     [sessionScore, duration] = calculateSessionScoreAndTime(activity_rows);
-    sessionName = await generateSessionName(activity_rows);
-    //TODO: add commentary generation here
-    //NOTE: should the code here be moved into what chatgpt was calling the api file? since this is calling llm logic. this is the delegating function...
   } catch (e) {
     console.error(
       "[SESSION_GENERATION] Error generating session attributes:",
@@ -36,47 +30,178 @@ export async function colourAndPersistSession(
     );
   }
 
+  // naming is an LLM call that can be rate limited; the session is saved regardless
+  try {
+    sessionName = await generateSessionName(activity_rows);
+    //TODO: add commentary generation here
+    //NOTE: should the code here be moved into what chatgpt was calling the api file? since this is calling llm logic. this is the delegating function...
+  } catch (e) {
+    console.error("[SESSION_GENERATION] Error naming session:", e);
+    sessionName = "Unnamed Session";
+  }
+
+  return {
+    session_name: sessionName,
+    productivity_score: sessionScore,
+    start_id: activity_id_start,
+    end_id: activity_id_end,
+    total_duration_sec: duration,
+    ...(commentary && {
+      commentary,
+      commentary_time: new Date().toISOString(),
+    }),
+    is_displayed: true,
+  };
+}
+
+// to be called once we decide the window for sessions, the window must be sessions (BACK)
+// commentary is optional; when given it is written with the session row itself,
+// saving the follow-up addCommentaryToSession round-trip
+export async function colourAndPersistSession(
+  activity_id_start,
+  activity_id_end,
+  commentary = null
+) {
+  const row = await buildSessionRow(activity_id_start, activity_id_end, commentary);
+
   const { data, error } = await supabase
     .from("activity_sessions")
-    .insert([
-      {
-        session_name: sessionName,
-        productivity_score: sessionScore,
-        start_id: activity_id_start,
-        end_id: activity_id_end,
-        total_duration_sec: duration,
-        // TODO: input commentary argument here
-        is_displayed: true,
-      },
-    ])
+    .insert([row])
     .select()
     .single();
 
   if (error) {
     console.error("[DB] Error saving session:", error);
   } else {
+    await assignSessionToActivities(data.id, activity_id_start, activity_id_end);
+
     console.log(
-      `[DATABASE] Saved session: ${sessionName} (score: ${sessionScore}, ${Math.floor(
-        duration / 60
+      `[DATABASE] Saved session: ${row.session_name} (score: ${row.productivity_score}, ${Math.floor(
+        row.total_duration_sec / 60
       )}min)`
     );
     return data.id;
   }
 }
 
+// an ended SessionState session -> its persisted id (BACK)
+export async function saveSession(activities) {
+  return colourAndPersistSession(activities[0].id, activities.at(-1).id);
+}
+
+// windows built at once by colourAndPersistSessions, each costing an LLM naming call
+const SESSION_BUILD_CONCURRENCY = 4;
+
+// like Promise.all(items.map(fn)), but with at most `limit` calls of fn in flight
+async function mapWithConcurrency(items, limit, fn) {
+  const results = new Array(items.length);
+  let next = 0;
+  async function worker() {
+    while (next < items.length) {
+      const i = next++;
+      results[i] = await fn(items[i]);
+    }
+  }
+  await Promise.all(
+    Array.from({ length: Math.min(limit, items.length) }, worker)
+  );
+  return results;
+}
+
+// Persists several [activity_id_start, activity_id_end, commentary?] windows with a
+// single activity_sessions insert, instead of one insert per session (BACK)
+// returns the new session ids in the order of ranges, or undefined if the insert fails
+export async function colourAndPersistSessions(ranges) {
+  if (!ranges.length) return [];
+
+  // windows are independent, so their fetches and LLM naming calls overlap, a few at a time
+  const sessionRows = await mapWithConcurrency(
+    ranges,
+    SESSION_BUILD_CONCURRENCY,
+    ([activity_id_start, activity_id_end, commentary = null]) =>
+      buildSessionRow(activity_id_start, activity_id_end, commentary)
+  );
+
+  const { data, error } = await supabase
+    .from("activity_sessions")
+    .insert(sessionRows)
+    .select("id, start_id, end_id");
+
+  // logged and not thrown, as in colourAndPersistSession
+  if (error) {
+    console.error("[DB] Error saving sessions:", error);
+    return;
+  }
+
+  await assignSessionsToActivities(data);
+
+  // the insert's returned rows are not guaranteed to follow input order, so ids are
+  // matched back by window; repeated windows each take their own id from the queue
+  const idsByRange = new Map();
+  for (const s of data) {
+    const key = `${s.start_id}:${s.end_id}`;
+    if (!idsByRange.has(key)) idsByRange.set(key, []);
+    idsByRange.get(key).push(s.id);
+  }
+
+  console.log(`[DATABASE] Saved ${data.length} sessions`);
+  return ranges.map(([activity_id_start, activity_id_end]) =>
+    idsByRange.get(`${activity_id_start}:${activity_id_end}`).shift()
+  );
+}
+
+// one ranged UPDATE links every activity in the window, instead of one per id
+async function assignSessionToActivities(sessionId, activity_id_start, activity_id_end) {
+  // same normalisation as fetchActivityLogsByIdRange, or a reversed window links nothing
+  if (activity_id_start > activity_id_end)
+    [activity_id_start, activity_id_end] = [activity_id_end, activity_id_start];
+
+  const { error } = await supabase
+    .from("activity_logs")
+    .update({ session_id: sessionId })
+    .gte("id", activity_id_start)
+    .lte("id", activity_id_end);
+
+  if (error) {
+    console.error("[DB] Error assigning session to activities:", error);
+  }
+}
+
+// every batch session's window linked in one statement via the
+// assign_sessions_to_activities function (supabase/sql/assign_sessions_to_activities.sql)
+async function assignSessionsToActivities(sessions) {
+  const { error } = await supabase.rpc("assign_sessions_to_activities", {
+    assignments: sessions.map((s) => ({
+      session_id: s.id,
+      start_id: s.start_id,
+      end_id: s.end_id,
+    })),
+  });
+
+  // PGRST202: the function isn't installed on this project yet; link per session instead
+  if (error?.code === "PGRST202") {
+    await Promise.all(
+      sessions.map((s) => assignSessionToActivities(s.id, s.start_id, s.end_id))
+    );
+  } else if (error) {
+    console.error("[DB] Error assigning sessions to activities:", error);
+  }
+}
+
 // probably a web call (FRONT)
 export async function getSessionsByDate(date = null) {
   if (!date) date = new Date();
   const startOfDay = new Date(date);
   startOfDay.setHours(0, 0, 0, 0);
-  const endOfDay = new Date(date);
-  endOfDay.setHours(23, 59, 59, 999);
+  // half-open [startOfDay, startOfNextDay): nothing in the day's last millisecond is lost
+  const startOfNextDay = new Date(startOfDay);
+  startOfNextDay.setDate(startOfNextDay.getDate() + 1);
 
   const { data, error } = await supabase
     .from("activity_sessions")
     .select()
     .gte("start_time", startOfDay.toISOString())
-    .lte("start_time", endOfDay.toISOString())
+    .lt("start_time", startOfNextDay.toISOString())
     .order("start_time", { ascending: true });
 
   if (error) {
@@ -103,5 +228,58 @@ export async function getSessionActivities(sessionId) {
   return data;
 }
 
+// PostgREST returns at most max_rows (supabase/config.toml) rows per request
+const PAGE_SIZE = 1000;
+
+// one IN-list query for many sessions instead of a getSessionActivities call per id (FRONT)
+// the combined rows can exceed one response, so it is read page by page
+export async function getSessionActivitiesBulk(sessionIds) {
+  const bySession = Object.fromEntries(sessionIds.map((id) => [id, []]));
+  if (!sessionIds.length) return bySession;
+
+  for (let from = 0; ; from += PAGE_SIZE) {
+    const { data, error } = await supabase
+      .from("activity_logs")
+      .select()
+      .in("session_id", sessionIds)
+      .order("session_id", { ascending: true })
+      .order("timestamp_start", { ascending: true })
+      // unique tie-breaker so page boundaries are stable
+      .order("id", { ascending: true })
+      .range(from, from + PAGE_SIZE - 1);
+
+    if (error) {
+      console.error("[DATABASE] Error fetching activities by sessions:", error);
+      throw error;
+    }
+
+    for (const row of data) bySession[row.session_id].push(row);
+    if (data.length < PAGE_SIZE) return bySession;
+  }
+}
+
+// session ids per IN list; keeps the request URL short on busy days
+const SESSION_ID_CHUNK = 100;
+
+// a day's sessions with their activities in a handful of paged queries, not one per session (FRONT)
+export async function getSessionsWithActivities(date = null) {
+  const sessions = await getSessionsByDate(date);
+  const ids = sessions.map((s) => s.id);
+
+  // each chunk is read completely by getSessionActivitiesBulk's paging
+  const activitiesBySession = {};
+  for (let i = 0; i < ids.length; i += SESSION_ID_CHUNK) {
+    Object.assign(
+      activitiesBySession,
+      await getSessionActivitiesBulk(ids.slice(i, i + SESSION_ID_CHUNK))
+    );
+  }
+
+  return sessions.map((s) => ({
+    ...s,
+    activities: activitiesBySession[s.id],
+  }));
+}
+
 // Helper function equivalents like find_smart_sessionization_ranges and calculate_processing_bounds
 // would also be rewritten similarly, but omitted here for brevity.
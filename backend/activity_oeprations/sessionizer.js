@@ -1,4 +1,27 @@
-import { saveSession } from "../database/session_operations.js";
+import { saveSession } from "./session.js";
+
+// In-place quickselect over arr[lo..hi]: returns the k-th smallest value and
+// leaves everything before index k <= it. Average O(n), versus O(n log n) to sort.
+function quickselect(arr, k, lo = 0, hi = arr.length - 1) {
+  while (hi > lo) {
+    const pivot = arr[(lo + hi) >> 1];
+    let i = lo;
+    let j = hi;
+    while (i <= j) {
+      while (arr[i] < pivot) i++;
+      while (arr[j] > pivot) j--;
+      if (i <= j) {
+        [arr[i], arr[j]] = [arr[j], arr[i]];
+        i++;
+        j--;
+      }
+    }
+    if (k <= j) hi = j;
+    else if (k >= i) lo = i;
+    else break;
+  }
+  return arr[k];
+}
 
 class SessionState {
   // Hard thresholds (minutes)
@@ -11,6 +34,21 @@ class SessionState {
   // Size of rolling raw score buffer (e.g., last 4h at 1-min interval)
   static BUFFER_SIZE = 240;
 
+  // New samples tolerated before the cached quartile thresholds are recomputed
+  static THRESH_REFRESH = 10;
+
+  // Plain fields round-tripped by toJSON/fromJSON, besides the scores
+  static SNAPSHOT_FIELDS = [
+    "current_session",
+    "current_context",
+    "context_start_time",
+    "ema_score",
+    "break_counter",
+    "work_counter",
+    "prev_session_meta",
+    "prev_activities",
+  ];
+
   constructor() {
     this.current_session = null;
     this.current_context = null;
@@ -18,9 +56,15 @@ class SessionState {
     this.ema_score = null;
     this.break_counter = 0;
     this.work_counter = 0;
-    this.score_buffer = [];
+    // fixed ring buffer: score_head is the next write slot, score_count the fill level
+    this.score_buffer = new Float64Array(this.constructor.BUFFER_SIZE);
+    this.score_head = 0;
+    this.score_count = 0;
+    this._thresh_cache = null;
+    this._thresh_dirty_count = 0;
     this.prev_session_meta = null;
     this.prev_activities = [];
+    this._save_queue = Promise.resolve();
   }
 
   _update_ema(score) {
@@ -34,22 +78,37 @@ class SessionState {
   }
 
   _update_buffer(score) {
-    this.score_buffer.push(score);
-    if (this.score_buffer.length > this.constructor.BUFFER_SIZE) {
-      this.score_buffer.shift();
-    }
+    const size = this.constructor.BUFFER_SIZE;
+    this.score_buffer[this.score_head] = score;
+    this.score_head = (this.score_head + 1) % size;
+    this.score_count = Math.min(this.score_count + 1, size);
+    this._thresh_dirty_count++;
   }
 
   _compute_dynamic_thresholds() {
-    const buf = [...this.score_buffer];
-    if (buf.length < 10) {
+    // quartiles over BUFFER_SIZE samples barely move within a few minutes
+    if (
+      this._thresh_cache !== null &&
+      this._thresh_dirty_count < this.constructor.THRESH_REFRESH
+    ) {
+      return this._thresh_cache;
+    }
+
+    if (this.score_count < 10) {
       return [20.0, 0.0];
     }
 
-    const sorted_buf = buf.sort((a, b) => a - b);
-    const i75 = Math.floor(0.75 * (sorted_buf.length - 1));
-    const i25 = Math.floor(0.25 * (sorted_buf.length - 1));
-    return [sorted_buf[i75], sorted_buf[i25]];
+    // quartiles ignore order, so the filled prefix can be copied as-is
+    const buf = this.score_buffer.slice(0, this.score_count);
+
+    const i75 = Math.floor(0.75 * (buf.length - 1));
+    const i25 = Math.floor(0.25 * (buf.length - 1));
+    // selecting i75 leaves the smaller values in buf[0..i75], so i25 only scans those
+    const work_thresh = quickselect(buf, i75);
+    const break_thresh = quickselect(buf, i25, 0, i75);
+    this._thresh_cache = [work_thresh, break_thresh];
+    this._thresh_dirty_count = 0;
+    return this._thresh_cache;
   }
 
   process_minute(activity, score) {
@@ -60,11 +119,13 @@ class SessionState {
     this._update_buffer(raw_score);
 
     const [work_thresh, break_thresh] = this._compute_dynamic_thresholds();
+    const { HARD_BREAK_MIN, HARD_WORK_MIN } = this.constructor;
+    const ema = this.ema_score;
 
-    if (this.ema_score < break_thresh) {
+    if (ema < break_thresh) {
       this.break_counter++;
       this.work_counter = 0;
-    } else if (this.ema_score > work_thresh) {
+    } else if (ema > work_thresh) {
       this.work_counter++;
       this.break_counter = 0;
     } else {
@@ -72,47 +133,52 @@ class SessionState {
       this.work_counter = Math.max(this.work_counter - 1, 0);
     }
 
-    if (
-      this.current_session &&
-      this.break_counter >= this.constructor.HARD_BREAK_MIN
-    ) {
+    if (this.current_session && this.break_counter >= HARD_BREAK_MIN) {
       this._end_session(now);
-    } else if (
-      !this.current_session &&
-      this.work_counter >= this.constructor.HARD_WORK_MIN
-    ) {
+    } else if (!this.current_session && this.work_counter >= HARD_WORK_MIN) {
       this._start_session(activity, now);
     }
   }
 
   _start_session(activity, start_time) {
-    if (this.current_session) {
-      this.prev_session_meta = {
-        dominant_type: this.current_context,
-        start_time: this.current_session.start_time,
-        duration: this.current_session.activities.reduce(
-          (sum, a) => sum + a.duration_sec,
-          0
-        ),
-        session_type: this.current_context,
-      };
-      this.prev_activities = [...this.current_session.activities];
-    } else {
-      this.prev_session_meta = null;
-      this.prev_activities = [];
-    }
-
-    this.current_session = { activities: [activity], start_time: start_time };
+    this.current_session = {
+      activities: [activity],
+      start_time: start_time,
+      total_duration: activity.duration_sec,
+    };
     this.current_context = "productive";
     this.context_start_time = start_time;
     console.log(`[SessionState] ▶️ Session started at ${start_time}`);
   }
 
-  async _end_session(end_time) {
+  _end_session(end_time) {
     const acts = this.current_session.activities;
-    const session_id = await saveSession(acts);
 
-    console.log(`[SessionState] ⏹️ Session ${session_id} ended at ${end_time}`);
+    this.prev_session_meta = {
+      dominant_type: this.current_context,
+      start_time: this.current_session.start_time,
+      duration: this.current_session.total_duration,
+      session_type: this.current_context,
+    };
+    // commentary only reads details and durations; don't pin the full rows
+    this.prev_activities = acts.map(({ details, duration_sec }) => ({
+      details,
+      duration_sec,
+    }));
+
+    // persist in the background so add_activity never waits on the DB write;
+    // saves are chained to keep them in session order
+    this._save_queue = this._save_queue
+      .then(() => saveSession(acts))
+      .then((session_id) => {
+        // colourAndPersistSession logs and resolves undefined when the insert fails
+        if (session_id === undefined) {
+          console.error(`[SessionState] Session ending at ${end_time} was not saved`);
+          return;
+        }
+        console.log(`[SessionState] ⏹️ Session ${session_id} ended at ${end_time}`);
+      })
+      .catch((e) => console.error("[SessionState] Error saving session:", e));
 
     this.current_session = null;
     this.current_context = null;
@@ -120,12 +186,57 @@ class SessionState {
     this.break_counter = 0;
     this.work_counter = 0;
     this.ema_score = null;
-    this.score_buffer = [];
+    this.score_head = 0;
+    this.score_count = 0;
+    this._thresh_cache = null;
+    this._thresh_dirty_count = 0;
+  }
+
+  // resolves once every ended session has been written
+  flush() {
+    return this._save_queue;
+  }
+
+  // Plain snapshot of the detector state so a restart can resume without
+  // re-warming the EMA and threshold buffer. Scores are stored oldest first.
+  toJSON() {
+    const size = this.constructor.BUFFER_SIZE;
+    const oldest = (this.score_head - this.score_count + size) % size;
+    const scores = [];
+    for (let i = 0; i < this.score_count; i++) {
+      scores.push(this.score_buffer[(oldest + i) % size]);
+    }
+
+    return {
+      current_session: this.current_session,
+      current_context: this.current_context,
+      context_start_time: this.context_start_time,
+      ema_score: this.ema_score,
+      break_counter: this.break_counter,
+      work_counter: this.work_counter,
+      scores,
+      prev_session_meta: this.prev_session_meta,
+      prev_activities: this.prev_activities,
+    };
+  }
+
+  static fromJSON(snapshot) {
+    const state = new this();
+    const { scores = [] } = snapshot;
+    // only what toJSON writes; internals like the ring buffer and save chain stay fresh
+    for (const key of this.SNAPSHOT_FIELDS) {
+      if (key in snapshot) state[key] = snapshot[key];
+    }
+    for (const score of scores.slice(-this.BUFFER_SIZE)) {
+      state._update_buffer(score);
+    }
+    return state;
   }
 
   add_activity(activity) {
     if (this.current_session) {
       this.current_session.activities.push(activity);
+      this.current_session.total_duration += activity.duration_sec;
     }
     this.process_minute(activity, activity.productivity_score);
   }
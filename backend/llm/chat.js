@@ -1,33 +1,58 @@
-import OpenAI from "openai";
-
-console.log('(1/3) [chat.js] chat.js module loaded.');
-
 // Check if we are in a Deno environment (cloud) or Node.js (local)
 const isDeno = typeof Deno !== 'undefined';
 
-const openai = new OpenAI({
-  apiKey: isDeno ? Deno.env.get("OPENAI_API_KEY") : process.env.OPENAI_API_KEY,
-});
+const OPENAI_API_KEY = isDeno ? Deno.env.get("OPENAI_API_KEY") : process.env.OPENAI_API_KEY;
+const CHAT_COMPLETIONS_URL = "https://api.openai.com/v1/chat/completions";
 
+// same retry policy the openai SDK applied: rate limits and server errors, twice
+const MAX_RETRIES = 2;
 
+function isRetryable(status) {
+  return status === 408 || status === 409 || status === 429 || status >= 500;
+}
+
+function retryDelayMs(response, attempt) {
+  const retryAfter = Number(response.headers.get("retry-after"));
+  if (retryAfter > 0) return Math.min(retryAfter * 1000, 60_000);
+  return 500 * 2 ** attempt;
+}
 
 async function chat(messages, { fmt = null, temperature = 0 } = {}) {
-  console.log('(2/3) [chat.js] Calling OpenAI API with messages:', messages);
-  const responseFormat = fmt === "json" ? { type: "json_object" } : null;
+  const body = {
+    model: (isDeno ? Deno.env.get("MODEL") : process.env.MODEL) || "gpt-4o-mini",
+    messages,
+    temperature,
+    ...(fmt === "json" && { response_format: { type: "json_object" } }),
+  };
 
   try {
-    const response = await openai.chat.completions.create({
-      model: (isDeno ? Deno.env.get("MODEL") : process.env.MODEL) || "gpt-4o-mini",
-      messages,
-      temperature,
-      response_format: responseFormat,
-    });
-    console.log('(3/3) [chat.js] Successfully received response from OpenAI API.');
-    return response;
+    for (let attempt = 0; ; attempt++) {
+      const response = await fetch(CHAT_COMPLETIONS_URL, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          Authorization: `Bearer ${OPENAI_API_KEY}`,
+        },
+        body: JSON.stringify(body),
+      });
+
+      if (response.ok) return await response.json();
+
+      if (attempt < MAX_RETRIES && isRetryable(response.status)) {
+        await new Promise((r) => setTimeout(r, retryDelayMs(response, attempt)));
+        continue;
+      }
+
+      const error = new Error(
+        `OpenAI API request failed with ${response.status}: ${await response.text()}`
+      );
+      error.status = response.status;
+      throw error;
+    }
   } catch (error) {
     console.error('[chat.js] Error calling OpenAI API:', error);
     throw error;
   }
 }
 
-export { chat };
\ No newline at end of file
+export { chat };
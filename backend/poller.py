@@ -4,7 +4,12 @@
 print("Starting poller script...")
 
 import datetime as dt
+import logging
+import queue
+import threading
 import time
+from logging.handlers import QueueHandler, QueueListener
+from subprocess import CalledProcessError, TimeoutExpired, check_output
 from typing import Tuple
 from dotenv import load_dotenv
 load_dotenv()
@@ -12,7 +17,31 @@ import os
 
 from supabase import create_client
 
+logger = logging.getLogger(__name__)
+
+try:
+    from pygetwindow import getActiveWindow
+except Exception as e:  # platform without active-window support
+    logger.warning("[POLLER] pygetwindow unavailable: %s", e)
+    getActiveWindow = None
+
 POLL_SEC = 10  # seconds
+INSERT_QUEUE_MAX = 256  # closed runs waiting to be written
+SHUTDOWN_DRAIN_SEC = 10  # how long exit waits for queued runs to be written
+RUN_FLUSH_SEC = 5 * 60  # a longer run is written and restarted, bounding what a crash loses
+CHROME_QUERY_TIMEOUT = 1.5  # seconds; a hung Chrome must not stall the poll
+
+_CHROME_SCRIPT = """
+tell application "Google Chrome"
+  if not (exists window 1) then return "Unknown||Unknown"
+  set t to title of active tab of front window
+  set u to URL of active tab of front window
+  return t & "||Google Chrome||" & u
+end tell
+"""
+
+# last tab details Chrome answered with, reused when a query stalls or fails
+_last_chrome_details = "Unknown|Unknown"
 
 
 def _get_active() -> Tuple[str, str]:
@@ -21,74 +50,130 @@ def _get_active() -> Tuple[str, str]:
       event   = "app_session" or "browser_tab_session"
       details = window title OR "<tab title>|<url>"
     """
-    try:
-        from pygetwindow import getActiveWindow
+    global _last_chrome_details
 
+    if getActiveWindow is None:
+        return ("app_session", "Unknown")
+
+    try:
         win = getActiveWindow()
         if not win:
             return ("app_session", "Unknown")
         title = win.title() if callable(win.title) else win.title
     except Exception as e:
-        print(f"[DEBUG] Error getting active window: {e}")
+        logger.debug("Error getting active window: %s", e)
         return ("app_session", "Unknown")
 
     if "Chrome" in title:
-        from subprocess import check_output
-
-        script = """
-tell application "Google Chrome"
-  if not (exists window 1) then return "Unknown||Unknown"
-  set t to title of active tab of front window
-  set u to URL of active tab of front window
-  return t & "||Google Chrome||" & u
-end tell
-"""
         try:
-            out = check_output(["osascript", "-e", script])
+            out = check_output(["osascript", "-e", _CHROME_SCRIPT], timeout=CHROME_QUERY_TIMEOUT)
             tab_title, app_name, url = out.decode().strip().split("||", 2)
-            return ("browser_tab_session", f"{tab_title} | {app_name} | {url}")
+            _last_chrome_details = f"{tab_title} | {app_name} | {url}"
+            return ("browser_tab_session", _last_chrome_details)
+        except (TimeoutExpired, CalledProcessError) as e:
+            logger.debug("Chrome tab query failed, reusing last tab: %s", e)
+            return ("browser_tab_session", _last_chrome_details)
         except Exception as e:
-            print(f"[DEBUG] Error getting Chrome tab details: {e}")
+            logger.debug("Error getting Chrome tab details: %s", e)
             return ("browser_tab_session", "Unknown|Unknown")
 
     return ("app_session", title)
 
 
+def _insert_activity(supabase, timestamp_start, details, duration):
+    try:
+        response = supabase.table("activity_logs").insert({
+            "timestamp_start": timestamp_start.isoformat(),
+            "details": details,
+            "duration_sec": duration,
+            "productivity_score": 0,
+            "user_provided": False,
+            "session_id": None,
+        }).execute()
+
+        if response.data is None or response.data == []:
+            logger.warning("[POLLER] Failed to insert activity log: no data returned")
+        else:
+            logger.debug("[POLLER] Logged activity: %s, duration %ss", details, duration)
+    except Exception as e:
+        logger.error("[POLLER] Error inserting activity log: %s", e)
+
+
+def _insert_worker(supabase, inserts: queue.Queue):
+    """Writes queued runs so a slow insert never delays the next sample."""
+    while True:
+        row = inserts.get()
+        if row is None:
+            return
+        _insert_activity(supabase, *row)
+
+
+def _enqueue_run(inserts: queue.Queue, run):
+    """Never blocks the sampler: if the writer has fallen this far behind, the run is dropped."""
+    try:
+        inserts.put_nowait(run)
+    except queue.Full:
+        logger.warning("[POLLER] Insert queue full, dropping run: %s (%ss)", run[1], run[2])
+
+
 def poll_loop(supabase):
     print("[POLLER] POLLER loop started!")
     prev_details = None
-    start_ts = time.time()
+    run_started_at = None
+    start_mono = time.monotonic()
+
+    inserts = queue.Queue(maxsize=INSERT_QUEUE_MAX)
+    writer = threading.Thread(target=_insert_worker, args=(supabase, inserts), daemon=True)
+    writer.start()
 
     try:
         while True:
             time.sleep(POLL_SEC)
 
             _, cur_details = _get_active()
-            duration = int(time.time() - start_ts)
-            timestamp = dt.datetime.now()
-
-            if cur_details != prev_details:
-                try:
-                    response = supabase.table("activity_logs").insert({
-                        "timestamp_start": timestamp.isoformat(),
-                        "details": cur_details,
-                        "duration_sec": duration,
-                        "productivity_score": 0,
-                        "user_provided": False,
-                        "session_id": None,
-                    }).execute()
-
-                    if response.data is None or response.data == []:
-                        print(f"[POLLER] Failed to insert activity log: no data returned")
-                    else:
-                        print(f"[POLLER] Logged activity: {cur_details}, duration {duration}s")
-                except Exception as e:
-                    print(f"[POLLER] Error inserting activity log: {e}")
+            mono = time.monotonic()
+
+            if cur_details != prev_details or mono - start_mono >= RUN_FLUSH_SEC:
+                # wall clock only for the stored timestamp; durations use the monotonic clock
+                timestamp = dt.datetime.now()
+                # a row describes the run that just ended: its window, start and length
+                if prev_details is not None:
+                    duration = int(mono - start_mono)
+                    _enqueue_run(inserts, (run_started_at, prev_details, duration))
 
                 prev_details = cur_details
-                start_ts = time.time()
+                run_started_at = timestamp
+                start_mono = mono
     except Exception as e:
-        print(f"[POLLER] Unhandled error in poll_loop: {e}")
+        logger.error("[POLLER] Unhandled error in poll_loop: %s", e)
+    finally:
+        # the window still open at shutdown is a run too
+        if prev_details is not None:
+            _enqueue_run(inserts, (run_started_at, prev_details, int(time.monotonic() - start_mono)))
+        # let already-closed runs reach the database, but don't hang exit on a stalled insert
+        try:
+            inserts.put(None, timeout=SHUTDOWN_DRAIN_SEC)
+        except queue.Full:
+            pass
+        writer.join(timeout=SHUTDOWN_DRAIN_SEC)
+        if writer.is_alive():
+            logger.warning("[POLLER] Writer still busy at exit; %d queued runs not written", inserts.qsize())
+
+
+def _start_log_listener() -> QueueListener:
+    """Log records are queued by the poller and written to stderr by a listener thread."""
+    log_queue = queue.Queue(-1)
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("%(message)s"))
+
+    # root keeps its WARNING default so libraries stay quiet (httpx logs every
+    # insert's request at INFO); only the poller's own records go down to INFO
+    logging.getLogger().addHandler(QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+
+    listener = QueueListener(log_queue, stream)
+    listener.start()
+    return listener
 
 
 def main():
@@ -107,7 +192,10 @@ def main():
 
 
 if __name__ == "__main__":
+    log_listener = _start_log_listener()
     try:
         main()
     except KeyboardInterrupt:
         print("\n[MAIN] Polling stopped by user.")
+    finally:
+        log_listener.stop()
@@ -1,7 +1,18 @@
+import functools
+import pathlib
+
 try:
-    from ..helpers.operations_helpers import PERSONA_DIGEST, chat
+    from ..helpers.operations_helpers import chat
 except ImportError:
-    from backend.helpers.operations_helpers import PERSONA_DIGEST, chat
+    from backend.helpers.operations_helpers import chat
+
+PERSONA_DIGEST_PATH = pathlib.Path(__file__).parent / "resources" / "persona_digest.txt"
+
+
+@functools.cache
+def load_persona_digest() -> str:
+    """Read the persona digest on first use instead of at import."""
+    return PERSONA_DIGEST_PATH.read_text(encoding="utf-8")
 
 
 def generate_transition_commentary(
@@ -9,7 +20,7 @@ def generate_transition_commentary(
     prev_activities,
     new_session_meta,
     new_activities,
-    persona_digest=PERSONA_DIGEST,
+    persona_digest=None,
     user_traits=None,
 ):
     """
@@ -19,7 +30,7 @@ def generate_transition_commentary(
     prev_activities: list of activities from previous session.
     new_session_meta: dict with info about new session.
     new_activities: list of activities from new session.
-    persona_digest: the book-extracted value system.
+    persona_digest: the book-extracted value system (defaults to the bundled digest).
     user_traits: optional, dict with user traits or behavior patterns.
     """
 
@@ -27,6 +38,9 @@ def generate_transition_commentary(
     if not prev_session_meta and not prev_activities:
         return ""
 
+    if persona_digest is None:
+        persona_digest = load_persona_digest()
+
     # Summarize previous and new contexts for the prompt
     def summarize(meta, acts):
         if not meta:
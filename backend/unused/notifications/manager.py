@@ -3,6 +3,7 @@
 Notification management for user interaction
 """
 
+import re
 import subprocess
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
@@ -11,6 +12,26 @@ from ..database.session_operations import (get_pending_sessions,
                                    update_session_classification)
 
 
+def _classify_score(score: int):
+    if score >= 25:
+        return "productive", "high"
+    elif score > 0:
+        return "productive", "low"
+    elif score == 0:
+        return "neutral", "neutral"
+    elif score > -25:
+        return "unproductive", "low"
+    else:
+        return "unproductive", "high"
+
+
+# a signed integer, optionally padded; anything else is rejected without int() raising
+_SCORE_RE = re.compile(r"^\s*([+-]?\d+)\s*$")
+
+# (classification, intensity) for every valid score, indexed by score + 50
+_SCORE_CLASSIFICATIONS = tuple(_classify_score(s) for s in range(-50, 51))
+
+
 class NotificationManager:
     """Handles user notifications for activity classification"""
 
@@ -82,25 +103,27 @@ Enter score (-50 to +50):" default answer "0" buttons {{"Submit", "Skip"}} defau
                     if button == "Skip":
                         return None
 
-                    try:
-                        score = int(score_text)
-                        if -50 <= score <= 50:
-                            # Convert score to classification and intensity
-                            classification, intensity = self._score_to_classification(
-                                score
-                            )
-
-                            return {
-                                "session_id": session_id,
-                                "classification": classification,
-                                "productivity_score": score,
-                                "intensity": intensity,
-                                "user_confirmed": True,
-                            }
-                        else:
-                            print(f"[NOTIFICATION] Invalid score range: {score}")
-                    except ValueError:
+                    match = _SCORE_RE.match(score_text)
+                    if not match:
                         print(f"[NOTIFICATION] Invalid score format: {score_text}")
+                        return None
+
+                    score = int(match.group(1))
+                    if -50 <= score <= 50:
+                        # Convert score to classification and intensity
+                        classification, intensity = self._score_to_classification(
+                            score
+                        )
+
+                        return {
+                            "session_id": session_id,
+                            "classification": classification,
+                            "productivity_score": score,
+                            "intensity": intensity,
+                            "user_confirmed": True,
+                        }
+                    else:
+                        print(f"[NOTIFICATION] Invalid score range: {score}")
 
         except subprocess.TimeoutExpired:
             print(f"[NOTIFICATION] User dialog timed out for session {session_id}")
@@ -111,16 +134,8 @@ Enter score (-50 to +50):" default answer "0" buttons {{"Submit", "Skip"}} defau
 
     def _score_to_classification(self, score: int):
         """Convert productivity score to classification and intensity"""
-        if score >= 25:
-            return "productive", "high"
-        elif score > 0:
-            return "productive", "low"
-        elif score == 0:
-            return "neutral", "neutral"
-        elif score > -25:
-            return "unproductive", "low"
-        else:
-            return "unproductive", "high"
+        # callers only pass scores already checked to be in -50..+50
+        return _SCORE_CLASSIFICATIONS[score + 50]
 
     def check_and_prompt_pending_sessions(self):
         """Check for and prompt user about pending sessions"""
@@ -161,10 +176,20 @@ Enter score (-50 to +50):" default answer "0" buttons {{"Submit", "Skip"}} defau
                 print(f"[NOTIFICATION] User skipped classification")
 
 
+_notification_manager: Optional[NotificationManager] = None
+
+
+def get_notification_manager() -> NotificationManager:
+    """Return the shared NotificationManager, creating it on first use"""
+    global _notification_manager
+    if _notification_manager is None:
+        _notification_manager = NotificationManager()
+    return _notification_manager
+
+
 def run_notification_check():
     """Main function to check and handle pending notifications"""
-    notification_manager = NotificationManager()
-    notification_manager.check_and_prompt_pending_sessions()
+    get_notification_manager().check_and_prompt_pending_sessions()
 
 
 if __name__ == "__main__":
@@ -5,16 +5,25 @@ import PyPDF2
 
 from config import MODEL, OPENAI_KEY
 
-openai.api_key = OPENAI_KEY
+# one client so every request reuses the same pooled keep-alive connection
+client = openai.OpenAI(api_key=OPENAI_KEY)
 
+# Only this much of the book is sent to the model
+BOOK_EXCERPT_CHARS = 5000
 
-def pdf_to_text(pdf_path):
-    text = ""
+
+def pdf_to_text(pdf_path, max_chars=None):
+    pages = []
+    total = 0
     with open(pdf_path, "rb") as f:
         reader = PyPDF2.PdfReader(f)
         for page in reader.pages:
-            text += page.extract_text() or ""
-    return text
+            page_text = page.extract_text() or ""
+            pages.append(page_text)
+            total += len(page_text)
+            if max_chars is not None and total >= max_chars:
+                break
+    return "".join(pages)
 
 
 def extract_digest_from_book(
@@ -33,7 +42,7 @@ Given the book "{book_title}" by {philosopher_name}, extract the following, with
 Return all of the above as a single JSON object for use in a digital productivity system.
 """
 
-    response = openai.chat.completions.create(
+    response = client.chat.completions.create(
         model=MODEL,
         messages=[
             {
@@ -44,7 +53,7 @@ Return all of the above as a single JSON object for use in a digital productivit
                 "role": "user",
                 "content": prompt
                 + "\n\n[BOOK START]\n"
-                + book_text[:5000]
+                + book_text[:BOOK_EXCERPT_CHARS]
                 + "\n[BOOK END]\n",
             },
         ],
@@ -63,7 +72,7 @@ if __name__ == "__main__":
         pathlib.Path(__file__).parent.parent / "resources" / "persona_digest.txt"
     )
 
-    text = pdf_to_text(pdf_path)
+    text = pdf_to_text(pdf_path, max_chars=BOOK_EXCERPT_CHARS)
     digest = extract_digest_from_book(text, philosopher, book)
     digest_path.write_text(digest, encoding="utf-8")
     print(f"Persona digest written to: {digest_path}")
@@ -1,6 +1,6 @@
 
 import { serve } from "https://deno.land/std@0.168.0/http/server.ts";
-import { setActivityScore } from "../../../backend/operations/activity.js";
+import { setActivityScore } from "../../../backend/activity_oeprations/activity.js";
 
 serve(async (req) => {
   try {
@@ -0,0 +1,8 @@
+-- Not a migration: the tables are not created by any migration in this repo, so
+-- this runs against an existing project (SQL editor or psql). Safe to re-run.
+--
+-- getSessionActivities filters on session_id and orders by timestamp_start, and
+-- getSessionActivitiesBulk orders by both; this lets Postgres answer them with an
+-- index range scan instead of a seq scan + sort.
+create index if not exists ix_activity_logs_session_ts
+  on public.activity_logs (session_id, timestamp_start);
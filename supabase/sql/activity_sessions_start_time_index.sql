@@ -0,0 +1,7 @@
+-- Not a migration: the tables are not created by any migration in this repo, so
+-- this runs against an existing project (SQL editor or psql). Safe to re-run.
+--
+-- getSessionsByDate filters activity_sessions by a start_time day range and
+-- orders by start_time; index it so the calendar read is a range scan.
+create index if not exists ix_activity_sessions_start_time
+  on public.activity_sessions (start_time);
@@ -0,0 +1,16 @@
+-- Not a migration: the tables are not created by any migration in this repo, so
+-- this runs against an existing project (SQL editor or psql). Safe to re-run.
+--
+-- colourAndPersistSessions links every saved session's activity id window to it
+-- with this single UPDATE instead of one ranged UPDATE per session.
+-- assignments: [{ "session_id": 1, "start_id": 10, "end_id": 20 }, ...]
+create or replace function public.assign_sessions_to_activities(assignments jsonb)
+returns void
+language sql
+as $$
+  update public.activity_logs a
+  set session_id = (r ->> 'session_id')::bigint
+  from jsonb_array_elements(assignments) r
+  where a.id between least((r ->> 'start_id')::bigint, (r ->> 'end_id')::bigint)
+                 and greatest((r ->> 'start_id')::bigint, (r ->> 'end_id')::bigint);
+$$;